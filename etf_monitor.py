@@ -4,50 +4,171 @@ Extracts and compares daily holdings data
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
 import json
-from datetime import datetime
+import codecs
+import sys
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import heapq
+import gzip
+from collections import deque
+from datetime import datetime, timezone
 import os
 from pathlib import Path
 import csv
 from io import StringIO
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Returned by get_holdings_data when iShares answers 304 Not Modified
+NOT_MODIFIED = object()
+
+# Report separator lines
+_EQ = "=" * 70
+_HR = "─" * 70
+
+
+def _parse_weight(value):
+    """Parse a weight cell ('5.2%', '5.2', 5.2) to float, None if unparseable"""
+    if type(value) is float:
+        return value
+    if not isinstance(value, str):
+        value = str(value)
+    if value.endswith('%'):
+        value = value[:-1]
+    try:
+        # Fast path: plain numbers go straight through float()
+        return float(value or 0)
+    except ValueError:
+        cleaned = value.replace('%', '').replace(',', '').strip()
+        try:
+            return float(cleaned) if cleaned else 0.0
+        except ValueError:
+            return None
+
+
+def _atomic_write(path, payload):
+    """Write bytes in one call to a temp file, then swap it into place"""
+    with _atomic_file(path, 'wb') as f:
+        f.write(payload)
+
+
+@contextmanager
+def _atomic_file(path, mode='w'):
+    """Open a temp file for writing, then swap it into place on success"""
+    # os.replace is enough to avoid torn files; the data dir is committed by git
+    # after the run, so no fsync. A failed write must not leave .tmp files behind
+    tmp = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class _Tee:
+    """Minimal writable stream that forwards every write to several streams"""
+    def __init__(self, *streams):
+        self.streams = streams
+    
+    def write(self, text):
+        for stream in self.streams:
+            stream.write(text)
+
+
+def _read_bytes(path):
+    """Read a data file, transparently decompressing .gz files"""
+    payload = path.read_bytes()
+    return gzip.decompress(payload) if path.suffix == '.gz' else payload
+
 class ETFHoldingsMonitor:
     def __init__(self, data_dir="etf_data"):
         self.base_url = "https://www.ishares.com/us/products/239508/ishares-us-financials-etf"
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        self.index_file = self.data_dir / "_index.txt"
         
-    def get_holdings_data(self):
-        """Fetch current holdings data from iShares"""
-        headers = {
+        # HTTP validators of the last saved JSON payload, sent back as conditional headers
+        self.etag_file = self.data_dir / ".etag"
+        self.lastmod_file = self.data_dir / ".lastmod"
+        self.pending_validators = {}
+        
+        # Parsed form of the last saved holdings, reused by compare_holdings
+        self.saved_fingerprint = None
+        self.saved_info = None
+        
+        # Name of the file load_previous_holdings last read from
+        self.previous_source = None
+        
+        # Reuse one pooled connection (and its TLS session) for every request
+        self.session = requests.Session()
+        self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': '*/*',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # Only advertise encodings urllib3 can decode here (br needs brotli installed)
+            'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
             'Referer': 'https://www.ishares.com/us/products/239508/ishares-us-financials-etf',
-        }
+        })
+        # Hand back the last 5xx response instead of raising, so the CSV fallback
+        # still runs; ignore Retry-After so a CDN can't stall the scheduled job
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504],
+                      raise_on_status=False, respect_retry_after_header=False)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
         
+    def get_holdings_data(self):
+        """Fetch current holdings data from iShares"""
         try:
             print(f"Fetching data from iShares...")
             
-            # Try JSON endpoint first
+            # Try JSON endpoint first, conditional on the last payload we saved
+            conditional = {}
+            if self.etag_file.exists():
+                conditional['If-None-Match'] = self.etag_file.read_text().strip()
+            if self.lastmod_file.exists():
+                conditional['If-Modified-Since'] = self.lastmod_file.read_text().strip()
+            
             holdings_url = f"{self.base_url}/1467271812596.ajax?tab=all&fileType=json"
-            response = requests.get(holdings_url, headers=headers, timeout=30)
+            response = self.session.get(holdings_url, headers=conditional, timeout=(5, 30))
+            
+            if response.status_code == 304:
+                print("✓ Holdings unchanged since last fetch (304 Not Modified)")
+                return NOT_MODIFIED
             
             if response.status_code == 200:
-                # Handle UTF-8 BOM if present
-                content = response.content.decode('utf-8-sig')
-                data = json.loads(content)
+                # Handle UTF-8 BOM if present; orjson parses the raw bytes directly
+                content = response.content
+                if content.startswith(codecs.BOM_UTF8):
+                    content = content[len(codecs.BOM_UTF8):]
+                data = orjson.loads(content) if orjson else json.loads(content)
                 holdings = data.get('aaData', [])
                 
                 if holdings:
                     print(f"✓ Successfully fetched {len(holdings)} holdings via JSON")
+                    # Persisted by save_holdings once the data is on disk
+                    self.pending_validators = {
+                        self.etag_file: response.headers.get('ETag'),
+                        self.lastmod_file: response.headers.get('Last-Modified')
+                    }
                     return holdings
             
             # Fallback: Try CSV endpoint
             print("Trying CSV endpoint...")
             csv_url = f"{self.base_url}/1467271812596.ajax?fileType=csv&fileName=IXG_holdings&dataType=fund"
-            response = requests.get(csv_url, headers=headers, timeout=30)
+            response = self.session.get(csv_url, timeout=(5, 30))
             
             if response.status_code == 200:
                 content = response.content.decode('utf-8-sig')
@@ -89,185 +210,341 @@ class ETFHoldingsMonitor:
                 pass
             return None
     
-    def save_holdings(self, holdings):
+    @staticmethod
+    def holdings_fingerprint(holdings):
+        """Stable digest of (ticker, weight) pairs, used to spot unchanged files"""
+        pairs = [[h[0], h[2]] for h in holdings if len(h) >= 3]
+        return hashlib.sha1(json.dumps(pairs, separators=(',', ':')).encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def extract_info(holdings):
+        """Map ticker -> (name, weight), weight parsed once (None if unparseable)"""
+        return {
+            ticker: (str(h[1]).strip(), _parse_weight(h[2]))
+            for h in holdings
+            if len(h) >= 3 and (ticker := str(h[0]).strip()) and ticker != '-'
+        }
+    
+    def save_holdings(self, holdings, now=None):
         """Save holdings data to JSON file"""
         if not holdings:
             return None
             
-        date_str = datetime.now().strftime("%Y-%m-%d")
+        now = now or datetime.now(timezone.utc)
+        date_str = now.strftime("%Y-%m-%d")
         filename = self.data_dir / f"holdings_{date_str}.json"
         
+        self.saved_fingerprint = self.holdings_fingerprint(holdings)
+        self.saved_info = None
+        
         data = {
             'date': date_str,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now.isoformat(),
             'holdings': holdings,
-            'total_count': len(holdings)
+            'total_count': len(holdings),
+            'fingerprint': self.saved_fingerprint
         }
         
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Compact output: the file is machine-read by the next run and the dashboard
+        if orjson:
+            payload = orjson.dumps(data)
+        else:
+            payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        _atomic_write(filename, payload)
+        
+        # Optional pretty-printed copy for debugging
+        if os.environ.get('ETF_MONITOR_DEBUG_JSON'):
+            debug_dir = self.data_dir / "debug"
+            debug_dir.mkdir(exist_ok=True)
+            (debug_dir / filename.name).write_text(json.dumps(data, indent=2))
+        
+        # Compact gzipped sidecar with the already-parsed holdings for tomorrow's
+        # diff, stored column-wise (parallel tickers/names/weights lists)
+        if msgpack:
+            info = self.saved_info = self.extract_info(holdings)
+            sidecar = {
+                'date': date_str,
+                'total_count': len(holdings),
+                'fingerprint': self.saved_fingerprint,
+                'tickers': list(info),
+                'names': [v[0] for v in info.values()],
+                'weights': [v[1] for v in info.values()]
+            }
+            # mtime=0 keeps the bytes reproducible for the committed data dir
+            payload = gzip.compress(msgpack.packb(sidecar), compresslevel=3, mtime=0)
+            _atomic_write(filename.with_suffix('.mp.gz'), payload)
+        
+        for path, value in self.pending_validators.items():
+            if value:
+                _atomic_write(path, value.encode('utf-8'))
+            elif path.exists():
+                path.unlink()
+        self.pending_validators = {}
+        
+        # Append-only index so the next run can find this file without a directory scan
+        with open(self.index_file, 'a') as f:
+            f.write(f"{date_str}\t{filename.name}\n")
         
         print(f"✓ Saved holdings to {filename}")
         return filename
     
-    def load_previous_holdings(self):
-        """Load most recent previous holdings data"""
-        files = sorted(self.data_dir.glob("holdings_*.json"), reverse=True)
+    def load_previous_holdings(self, current_date=None, quiet=False):
+        """Load most recent previous holdings data
         
-        if len(files) < 2:
-            return None
+        With current_date, loads the newest file from any other date, so this
+        can run before today's holdings are saved. Without it, the newest file
+        is assumed to be today's and the one before it is loaded. With quiet,
+        the success message is left to the caller (see previous_source).
+        """
+        prev_file = None
+        skip = f"holdings_{current_date}.json" if current_date else None
+        
+        def previous(names):
+            # names are newest first
+            exclude = skip or (names[0] if names else None)
+            return next((n for n in names if n != exclude), None)
+        
+        # Newest entries of the index, deduplicated (same-day re-runs append twice)
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r') as f:
+                    recent = [line.rstrip('\n').split('\t')[-1] for line in deque(f, maxlen=8)]
+                name = previous(list(dict.fromkeys(reversed(recent))))
+                if name and (self.data_dir / name).exists():
+                    prev_file = self.data_dir / name
+        except Exception as e:
+            print(f"Error reading {self.index_file.name}, scanning directory instead: {e}")
+        
+        # Fall back to scanning the directory (first run or missing index).
+        # Only the two newest files matter; no need to sort the whole history
+        if prev_file is None:
+            files = heapq.nlargest(2, self.data_dir.glob("holdings_*.json"))
+            name = previous([f.name for f in files])
             
-        # Get second most recent file
-        prev_file = files[1]
+            if name is None:
+                return None
+                
+            prev_file = self.data_dir / name
+        
+        # Prefer the parsed sidecar (gzipped, or plain from older runs)
+        for sidecar in (prev_file.with_suffix('.mp.gz'), prev_file.with_suffix('.mp')):
+            if msgpack and sidecar.exists():
+                try:
+                    data = msgpack.unpackb(_read_bytes(sidecar), raw=False)
+                    if 'tickers' in data:
+                        data['info'] = dict(zip(data.pop('tickers'), zip(data.pop('names'), data.pop('weights'))))
+                    self.previous_source = sidecar.name
+                    if not quiet:
+                        print(f"✓ Loaded previous data from {sidecar.name}")
+                    return data
+                except Exception as e:
+                    print(f"Error loading {sidecar.name}, falling back to JSON: {e}")
+                break
         
         try:
-            with open(prev_file, 'r') as f:
-                data = json.load(f)
+            payload = prev_file.read_bytes()
+            data = orjson.loads(payload) if orjson else json.loads(payload)
+            self.previous_source = prev_file.name
+            if not quiet:
                 print(f"✓ Loaded previous data from {prev_file.name}")
-                return data
+            return data
         except Exception as e:
             print(f"Error loading previous holdings: {e}")
             return None
     
-    def compare_holdings(self, current_holdings, previous_data):
-        """Compare current holdings with previous day"""
+    def compare_holdings(self, current_holdings, previous_data, now=None,
+                         current_info=None, current_fingerprint=None):
+        """Compare current holdings with previous day
+        
+        current_info and current_fingerprint can be passed in when already
+        computed (save_holdings keeps them) to avoid parsing the rows again.
+        """
+        date_str = (now or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+        
         if not previous_data:
             return {
                 'status': 'first_run',
+                'date': date_str,
                 'message': 'No previous data to compare',
                 'total_holdings': len(current_holdings)
             }
         
-        previous_holdings = previous_data.get('holdings', [])
-        
-        # Extract tickers and weights
-        def extract_info(holdings):
-            info = {}
-            for h in holdings:
-                if len(h) >= 3:
-                    ticker = str(h[0]).strip()
-                    name = str(h[1]).strip() if len(h) > 1 else ""
-                    weight_str = str(h[2]).strip() if len(h) > 2 else "0"
-                    
-                    if ticker and ticker != '-':
-                        info[ticker] = {
-                            'name': name,
-                            'weight': weight_str
-                        }
-            return info
-        
-        current_info = extract_info(current_holdings)
-        previous_info = extract_info(previous_holdings)
-        
-        current_tickers = set(current_info.keys())
-        previous_tickers = set(previous_info.keys())
-        
-        new_holdings = current_tickers - previous_tickers
-        removed_holdings = previous_tickers - current_tickers
+        # Parsed sidecar data carries 'info' directly; raw JSON needs extracting
+        previous_info = previous_data.get('info')
+        if previous_info is None:
+            previous_holdings = previous_data.get('holdings', [])
+            previous_count = len(previous_holdings)
+        else:
+            previous_count = previous_data.get('total_count', len(previous_info))
+        
+        if not previous_count:
+            return {
+                'status': 'first_run',
+                'date': date_str,
+                'message': 'No previous data to compare',
+                'total_holdings': len(current_holdings)
+            }
+        
+        # Identical file to last time (e.g. weekends): nothing to diff
+        if (len(current_holdings) == previous_count
+                and previous_data.get('fingerprint')
+                == (current_fingerprint or self.holdings_fingerprint(current_holdings))):
+            return {
+                'status': 'success',
+                'date': date_str,
+                'previous_date': previous_data.get('date', 'Unknown'),
+                'total_holdings': len(current_holdings),
+                'new_holdings': [],
+                'removed_holdings': [],
+                'weight_changes': [],
+                'top_weight_changes': [],
+                'significant_changes': 0
+            }
+        
+        if current_info is None:
+            current_info = self.extract_info(current_holdings)
+        if previous_info is None:
+            previous_info = self.extract_info(previous_holdings)
+        
+        # One pass over each side instead of three set operations
+        new_holdings, kept_holdings = [], []
+        for ticker in current_info:
+            (kept_holdings if ticker in previous_info else new_holdings).append(ticker)
+        removed_holdings = [t for t in previous_info if t not in current_info]
         
         # Find weight changes
         weight_changes = []
-        for ticker in current_tickers.intersection(previous_tickers):
-            curr_weight_str = str(current_info[ticker]['weight']).replace('%', '').replace(',', '').strip()
-            prev_weight_str = str(previous_info[ticker]['weight']).replace('%', '').replace(',', '').strip()
+        for ticker in kept_holdings:
+            name, curr_weight = current_info[ticker]
+            prev_weight = previous_info[ticker][1]
             
-            try:
-                curr_weight = float(curr_weight_str) if curr_weight_str else 0
-                prev_weight = float(prev_weight_str) if prev_weight_str else 0
-                
-                if abs(curr_weight - prev_weight) > 0.01:
-                    weight_changes.append({
-                        'ticker': ticker,
-                        'name': current_info[ticker]['name'],
-                        'previous_weight': prev_weight,
-                        'current_weight': curr_weight,
-                        'change': curr_weight - prev_weight
-                    })
-            except (ValueError, TypeError):
+            if curr_weight is None or prev_weight is None:
                 continue
+            
+            change = curr_weight - prev_weight
+            if abs(change) > 0.01:
+                weight_changes.append({
+                    'ticker': ticker,
+                    'name': name,
+                    'previous_weight': prev_weight,
+                    'current_weight': curr_weight,
+                    'change': change
+                })
         
         return {
             'status': 'success',
-            'date': datetime.now().strftime("%Y-%m-%d"),
+            'date': date_str,
             'previous_date': previous_data.get('date', 'Unknown'),
             'total_holdings': len(current_holdings),
-            'new_holdings': [{'ticker': t, 'name': current_info[t]['name']} for t in new_holdings],
-            'removed_holdings': [{'ticker': t, 'name': previous_info[t]['name']} for t in removed_holdings],
-            'weight_changes': sorted(weight_changes, key=lambda x: abs(x['change']), reverse=True),
+            'new_holdings': [(t, current_info[t][0]) for t in new_holdings],
+            'removed_holdings': [(t, previous_info[t][0]) for t in removed_holdings],
+            'weight_changes': weight_changes,
+            'top_weight_changes': heapq.nlargest(10, weight_changes, key=lambda x: abs(x['change'])),
             'significant_changes': len(new_holdings) + len(removed_holdings) + len(weight_changes)
         }
     
-    def generate_report(self, comparison):
-        """Generate a readable report of changes"""
-        report = []
-        report.append("=" * 70)
-        report.append("iShares US Financials ETF (IXG) - Daily Holdings Report")
-        report.append("=" * 70)
-        report.append(f"\nReport Date: {comparison.get('date', 'N/A')}")
-        
-        if comparison['status'] == 'first_run':
-            report.append(f"\nTotal Holdings: {comparison['total_holdings']}")
-            report.append("\n⚠️  This is the first data collection.")
-            report.append("No historical data available for comparison.")
-            report.append("\nStarting tomorrow, you'll see daily changes!")
+    def generate_report(self, comparison, now=None, out=None):
+        """Write a readable report of changes to out, line by line
+        
+        Without out, the report is collected and returned as a string.
+        """
+        buffer = StringIO() if out is None else None
+        write = (out or buffer).write
+        
+        def emit(line):
+            write(line)
+            write("\n")
+        
+        emit(_EQ)
+        emit("iShares US Financials ETF (IXG) - Daily Holdings Report")
+        emit(_EQ)
+        emit(f"\nReport Date: {comparison.get('date', 'N/A')}")
+        
+        if comparison['status'] == 'not_modified':
+            emit(f"\n{_HR}")
+            emit("✓ iShares holdings file unchanged since the last update")
+            emit(_HR)
+        elif comparison['status'] == 'first_run':
+            emit(f"\nTotal Holdings: {comparison['total_holdings']}")
+            emit("\n⚠️  This is the first data collection.")
+            emit("No historical data available for comparison.")
+            emit("\nStarting tomorrow, you'll see daily changes!")
         else:
-            report.append(f"Comparing with: {comparison.get('previous_date', 'N/A')}")
-            report.append(f"\nTotal Holdings: {comparison['total_holdings']}")
-            report.append(f"Total Changes Detected: {comparison['significant_changes']}")
+            emit(f"Comparing with: {comparison.get('previous_date', 'N/A')}")
+            emit(f"\nTotal Holdings: {comparison['total_holdings']}")
+            emit(f"Total Changes Detected: {comparison['significant_changes']}")
             
             if comparison['new_holdings']:
-                report.append(f"\n{'─' * 70}")
-                report.append(f"📈 NEW HOLDINGS ADDED ({len(comparison['new_holdings'])})")
-                report.append(f"{'─' * 70}")
-                for holding in comparison['new_holdings']:
-                    report.append(f"  ✓ {holding['ticker']}")
-                    if holding['name']:
-                        report.append(f"    {holding['name']}")
+                emit(f"\n{_HR}")
+                emit(f"📈 NEW HOLDINGS ADDED ({len(comparison['new_holdings'])})")
+                emit(_HR)
+                for ticker, name in comparison['new_holdings']:
+                    emit(f"  ✓ {ticker}")
+                    if name:
+                        emit(f"    {name}")
             
             if comparison['removed_holdings']:
-                report.append(f"\n{'─' * 70}")
-                report.append(f"📉 HOLDINGS REMOVED ({len(comparison['removed_holdings'])})")
-                report.append(f"{'─' * 70}")
-                for holding in comparison['removed_holdings']:
-                    report.append(f"  ✗ {holding['ticker']}")
-                    if holding['name']:
-                        report.append(f"    {holding['name']}")
+                emit(f"\n{_HR}")
+                emit(f"📉 HOLDINGS REMOVED ({len(comparison['removed_holdings'])})")
+                emit(_HR)
+                for ticker, name in comparison['removed_holdings']:
+                    emit(f"  ✗ {ticker}")
+                    if name:
+                        emit(f"    {name}")
             
             if comparison['weight_changes']:
-                report.append(f"\n{'─' * 70}")
-                report.append(f"⚖️  SIGNIFICANT WEIGHT CHANGES (Top 10)")
-                report.append(f"{'─' * 70}")
+                emit(f"\n{_HR}")
+                emit(f"⚖️  SIGNIFICANT WEIGHT CHANGES (Top 10)")
+                emit(_HR)
                 
-                for change in comparison['weight_changes'][:10]:
+                for change in comparison['top_weight_changes']:
                     direction = "↑" if change['change'] > 0 else "↓"
-                    report.append(f"\n  {direction} {change['ticker']}")
+                    emit(f"\n  {direction} {change['ticker']}")
                     if change['name']:
-                        report.append(f"    {change['name']}")
-                    report.append(f"    {change['previous_weight']:.3f}% → {change['current_weight']:.3f}% "
-                                f"({change['change']:+.3f}%)")
+                        emit(f"    {change['name']}")
+                    emit(f"    {change['previous_weight']:.3f}% → {change['current_weight']:.3f}% "
+                         f"({change['change']:+.3f}%)")
                 
                 if len(comparison['weight_changes']) > 10:
-                    report.append(f"\n  ... and {len(comparison['weight_changes']) - 10} more weight changes")
+                    emit(f"\n  ... and {len(comparison['weight_changes']) - 10} more weight changes")
             
             if comparison['significant_changes'] == 0:
-                report.append(f"\n{'─' * 70}")
-                report.append("✓ No significant changes detected since last update")
-                report.append(f"{'─' * 70}")
+                emit(f"\n{_HR}")
+                emit("✓ No significant changes detected since last update")
+                emit(_HR)
         
-        report.append(f"\n{'=' * 70}")
-        report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
-        report.append("=" * 70)
+        emit(f"\n{_EQ}")
+        now = now or datetime.now(timezone.utc)
+        emit(f"Generated: {now.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+        emit(_EQ)
         
-        return "\n".join(report)
+        if buffer is not None:
+            return buffer.getvalue()
     
     def run_daily_check(self):
         """Main function to run daily holdings check"""
-        print(f"\n{'=' * 70}")
-        print(f"Starting ETF Holdings Check - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"{'=' * 70}\n")
+        # One timestamp for the whole run so every file gets the same date,
+        # even if the run straddles midnight UTC
+        now = datetime.now(timezone.utc)
+        date_str = now.strftime("%Y-%m-%d")
+        print(f"\n{_EQ}")
+        print(f"Starting ETF Holdings Check - {now.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{_EQ}\n")
         
-        # Fetch current data
-        current_holdings = self.get_holdings_data()
+        # Fetch current data while the previous day's data loads from disk
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fetch = executor.submit(self.get_holdings_data)
+            load = executor.submit(self.load_previous_holdings, date_str, quiet=True)
+            current_holdings = fetch.result()
+            
+            # On failure or 304 there is nothing to compare: drop the load
+            previous_data = None
+            if not current_holdings or current_holdings is NOT_MODIFIED:
+                load.cancel()
+            else:
+                previous_data = load.result()
+                if previous_data:
+                    print(f"✓ Loaded previous data from {self.previous_source}")
         
         if not current_holdings:
             print("\n❌ Failed to fetch holdings data.")
@@ -278,26 +555,37 @@ class ETFHoldingsMonitor:
             print("\nWill retry on next scheduled run.")
             return None
         
-        # Save current data
-        self.save_holdings(current_holdings)
-        
-        # Load previous data
-        previous_data = self.load_previous_holdings()
-        
-        # Compare
-        comparison = self.compare_holdings(current_holdings, previous_data)
-        
-        # Generate and print report
-        report = self.generate_report(comparison)
-        print(f"\n{report}\n")
+        if current_holdings is NOT_MODIFIED:
+            # Nothing new to save, load or compare
+            comparison = {
+                'status': 'not_modified',
+                'date': date_str,
+                'message': 'Holdings file unchanged since the last update'
+            }
+        else:
+            # Save current data
+            self.save_holdings(current_holdings, now)
+            
+            # Compare
+            comparison = self.compare_holdings(current_holdings, previous_data, now,
+                                               self.saved_info, self.saved_fingerprint)
         
-        # Save report
-        date_str = datetime.now().strftime("%Y-%m-%d")
+        # Stream the report to stdout and the report file in one pass
+        # (a same-day re-run that got 304 keeps the full report)
         report_file = self.data_dir / f"report_{date_str}.txt"
-        with open(report_file, 'w') as f:
-            f.write(report)
+        keep_existing = comparison['status'] == 'not_modified' and report_file.exists()
+        print()
+        if keep_existing:
+            self.generate_report(comparison, now, sys.stdout)
+        else:
+            with _atomic_file(report_file) as f:
+                self.generate_report(comparison, now, _Tee(sys.stdout, f))
+        print()
         
-        print(f"📄 Report saved to: {report_file}")
+        if keep_existing:
+            print(f"📄 Keeping existing report: {report_file}")
+        else:
+            print(f"📄 Report saved to: {report_file}")
         
         return comparison
 